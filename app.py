@@ -2,7 +2,7 @@ import streamlit as st
 import os
 import json
 from pathlib import Path
-from groq import Groq
+from groq import AsyncGroq
 from dotenv import load_dotenv
 
 # Ensure we can import from src
@@ -14,6 +14,7 @@ from pipeline import (
     generate_component,
 )
 from session import ComponentSession
+from async_utils import AsyncLoopThread
 
 # Page Config
 st.set_page_config(
@@ -26,7 +27,7 @@ st.set_page_config(
 # Load Env
 load_dotenv()
 
-# Design System
+# Design System (load_design_system is already cached per file mtime)
 design_system = load_design_system()
 
 # CSS for styling
@@ -57,14 +58,21 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Shared Resources (the Groq client's connection pool is bound to the loop it runs on)
+@st.cache_resource
+def get_loop_thread() -> AsyncLoopThread:
+    return AsyncLoopThread()
+
+@st.cache_resource
+def get_groq_client() -> AsyncGroq:
+    return AsyncGroq(api_key=os.environ["GROQ_API_KEY"])
+
 # Session State Initialization
 if "session" not in st.session_state:
-    api_key = os.environ.get("GROQ_API_KEY")
-    if not api_key:
+    if not os.environ.get("GROQ_API_KEY"):
         st.error("GROQ_API_KEY not found in environment. Please check your .env file.")
         st.stop()
-    client = Groq(api_key=api_key)
-    st.session_state.session = ComponentSession(client=client, verbose=False) # verbose false to avoid stdout capture issues
+    st.session_state.session = ComponentSession(client=get_groq_client(), verbose=False, loop_thread=get_loop_thread(), design_system=design_system) # verbose false to avoid stdout capture issues
 
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -83,9 +91,7 @@ with st.sidebar:
     
     if st.button("Clear Session"):
         st.session_state.messages = []
-        api_key = os.environ.get("GROQ_API_KEY")
-        client = Groq(api_key=api_key)
-        st.session_state.session = ComponentSession(client=client, verbose=False)
+        st.session_state.session = ComponentSession(client=get_groq_client(), verbose=False, loop_thread=get_loop_thread(), design_system=design_system)
         st.rerun()
 
 # Header
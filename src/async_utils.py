@@ -0,0 +1,19 @@
+import asyncio
+import threading
+from functools import lru_cache
+from typing import Any, Coroutine
+
+
+class AsyncLoopThread:
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def run_coroutine(self, coro: Coroutine[Any, Any, Any]) -> Any:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+
+@lru_cache(maxsize=1)
+def default_loop_thread() -> AsyncLoopThread:
+    return AsyncLoopThread()
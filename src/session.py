@@ -1,17 +1,19 @@
 import os
-import json
 from pathlib import Path
 from typing import Optional
-from groq import Groq
+from groq import AsyncGroq
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from async_utils import AsyncLoopThread, default_loop_thread
 from pipeline import (
+    dump_json,
+    tokens_block,
     load_design_system,
     sanitize_user_input,
     validate_component,
-    call_llm,
+    acall_llm,
     MAX_RETRIES,
     SYSTEM_PROMPT,
 )
@@ -28,10 +30,9 @@ Output ONLY the complete updated TypeScript component code. No explanations."""
 
 
 def build_edit_prompt(current_code: str, edit_instruction: str, design_system: dict) -> str:
-    tokens_json = json.dumps(design_system["tokens"], indent=2)
     sanitized = sanitize_user_input(edit_instruction)
     return f"""Design System Tokens (USE ONLY THESE VALUES):
-{tokens_json}
+{tokens_block(design_system)}
 
 Current Component Code:
 {current_code}
@@ -43,26 +44,40 @@ Apply the edit. Output the complete updated component as raw TypeScript only."""
 
 
 class ComponentSession:
-    def __init__(self, client: Groq, verbose: bool = True):
-        self.client = client
+    def __init__(
+        self,
+        client: Optional[AsyncGroq] = None,
+        verbose: bool = True,
+        loop_thread: Optional[AsyncLoopThread] = None,
+        design_system: Optional[dict] = None,
+    ):
+        self.client = client or AsyncGroq(api_key=os.environ.get("GROQ_API_KEY"))
+        self.loop_thread = loop_thread or default_loop_thread()
         self.verbose = verbose
-        self.design_system = load_design_system()
+        self.design_system = design_system or load_design_system()
         self.current_code: Optional[str] = None
         self.history: list[dict] = []
 
     def create(self, prompt: str, output_path: Optional[Path] = None) -> dict:
-        from pipeline import generate_component
-        result = generate_component(
+        return self.loop_thread.run_coroutine(self.acreate(prompt, output_path))
+
+    def edit(self, instruction: str, output_path: Optional[Path] = None) -> dict:
+        return self.loop_thread.run_coroutine(self.aedit(instruction, output_path))
+
+    async def acreate(self, prompt: str, output_path: Optional[Path] = None) -> dict:
+        from pipeline import agenerate_component
+        result = await agenerate_component(
             user_prompt=prompt,
             client=self.client,
             output_path=output_path,
             verbose=self.verbose,
+            design_system=self.design_system,
         )
         self.current_code = result["final_code"]
         self.history.append({"type": "create", "prompt": prompt, "result": result})
         return result
 
-    def edit(self, instruction: str, output_path: Optional[Path] = None) -> dict:
+    async def aedit(self, instruction: str, output_path: Optional[Path] = None) -> dict:
         if not self.current_code:
             raise ValueError("No component exists yet. Call create() first.")
 
@@ -93,7 +108,7 @@ class ComponentSession:
             if self.verbose:
                 print("Calling LLM for edit...")
 
-            current_code = call_llm(prompt, self.client)
+            current_code = await acall_llm(prompt, self.client)
             is_valid, current_errors = validate_component(current_code, self.design_system)
 
             result["attempts"].append({
@@ -136,7 +151,7 @@ class ComponentSession:
                 "valid": entry["result"]["valid"],
                 "errors": entry["result"]["errors"],
             })
-        path.write_text(json.dumps(slim, indent=2))
+        path.write_text(dump_json(slim))
 
 
 def interactive_session():
@@ -147,7 +162,7 @@ def interactive_session():
         print("Error: GROQ_API_KEY not set.")
         sys.exit(1)
 
-    client = Groq(api_key=api_key)
+    client = AsyncGroq(api_key=api_key)
     session = ComponentSession(client=client, verbose=True)
     output_path = Path("output") / "session.component.ts"
 